@@ -13,6 +13,12 @@ class Settings(BaseSettings):
     # Gemini API
     gemini_api_key: str = ""
     
+    # Ceiling for concurrent Gemini Vision calls per process; the actual
+    # limit adapts between 1 and this value based on rate-limit feedback
+    gemini_concurrency: int = 8
+    # Client-side requests-per-minute budget for Gemini Vision (0 disables)
+    gemini_rpm: int = 12
+    
     # Firebase
     firebase_project_id: str = ""
     firebase_private_key: str = ""
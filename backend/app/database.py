@@ -4,7 +4,7 @@ Local SQLite database for MedVision AI.
 """
 
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 from pathlib import Path
 
@@ -17,9 +17,30 @@ DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATABASE_PATH}")
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False},  # Required for SQLite
+    # Compiled-statement cache (default 500 entries); sized so the per-model
+    # CRUD statements across all tables stay compiled
+    query_cache_size=1200,
     echo=False  # Set True for SQL query logging
 )
 
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL: readers don't block on a writer, so concurrent chats can load
+        # history while another request commits a message. In WAL mode
+        # synchronous=NORMAL is still corruption-safe and skips the fsync
+        # on every commit.
+        # journal_mode=WAL is persistent: the first connection converts the
+        # database file itself (including the tracked medvision.db), and
+        # SQLite versions before 3.7.0 can no longer open it. While it is in
+        # use, medvision.db-wal and medvision.db-shm sit next to it
+        # (gitignored).
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -40,6 +61,19 @@ def init_db():
     """Initialize database tables."""
     from app import sql_models  # Import models to register them
     Base.metadata.create_all(bind=engine)
+    # Follows created before uq_follow_pair existed may hold duplicate pairs,
+    # which would make adding the unique index fail: keep one row per pair
+    if "uq_follow_pair" not in {ix["name"] for ix in inspect(engine).get_indexes("follows")}:
+        with engine.begin() as conn:
+            conn.execute(text(
+                "DELETE FROM follows WHERE id NOT IN "
+                "(SELECT MIN(id) FROM follows GROUP BY follower_id, following_id)"
+            ))
+    # create_all skips tables that already exist, so add any index defined
+    # since an existing database was created
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
     print(f"Database initialized at: {DATABASE_PATH}")
 
 
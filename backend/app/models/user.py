@@ -22,8 +22,8 @@ class UserRole(str, Enum):
 
 
 # Country tiers for verification
-TIER_1_COUNTRIES = ["India", "United States", "United Kingdom", "Australia", "Canada"]
-TIER_2_COUNTRIES = ["Germany", "France", "Japan", "South Korea", "Singapore", "UAE", "Saudi Arabia"]
+TIER_1_COUNTRIES = frozenset({"India", "United States", "United Kingdom", "Australia", "Canada"})
+TIER_2_COUNTRIES = frozenset({"Germany", "France", "Japan", "South Korea", "Singapore", "UAE", "Saudi Arabia"})
 # All others are Tier 3
 
 SPECIALIZATIONS = [
@@ -34,7 +34,7 @@ from app.services.auth_service import (
     get_patient_by_id,
     patients_db
 )
-from app.services.verification_service import verification_service
+from app.services.verification_service import get_verification_service
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 security = HTTPBearer(auto_error=False)
@@ -311,7 +311,7 @@ async def verify_documents(
     
     # Run Gemini verification
     try:
-        result = await verification_service.verify_doctor_documents(form_data, doc_data)
+        result = await get_verification_service().verify_doctor_documents(form_data, doc_data)
         
         # Return comprehensive verification results
         return {
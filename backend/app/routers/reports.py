@@ -36,6 +36,10 @@ async def upload_and_interpret_report(
             detail=f"File type not supported. Allowed: {', '.join(allowed_types)}"
         )
     
+    # Warm the patient's stored reports while extraction and interpretation run
+    if patient_id:
+        get_report_storage().prefetch(patient_id)
+    
     # Read file content
     content = await file.read()
     print(f"[Upload] File size: {len(content)} bytes")
@@ -78,7 +82,7 @@ async def upload_and_interpret_report(
     # Save to JSON file if patient_id provided
     if patient_id:
         report_storage = get_report_storage()
-        report_id = report_storage.save_report(patient_id, response_data, file_content=content)
+        report_id = await report_storage.save_report_async(patient_id, response_data, file_content=content)
         response_data["report_id"] = report_id
         response_data["saved"] = True
         print(f"[Upload] Report saved with ID: {report_id}")
@@ -125,7 +129,9 @@ async def delete_patient_report(patient_id: str, report_id: str):
 async def download_patient_report(patient_id: str, report_id: str):
     """Download the original uploaded file for a report."""
     report_storage = get_report_storage()
-    file_path = report_storage.get_file_path(patient_id, report_id)
+    # Load the report once; it carries both the stored path and the original filename
+    report = report_storage.get_report(patient_id, report_id)
+    file_path = Path(report["file_path"]) if report and report.get("file_path") else None
     
     if not file_path or not file_path.exists():
         raise HTTPException(
@@ -133,9 +139,7 @@ async def download_patient_report(patient_id: str, report_id: str):
             detail="Original file not found. This report may have been uploaded before file storage was enabled."
         )
     
-    # Get the report to retrieve the original filename
-    report = report_storage.get_report(patient_id, report_id)
-    original_filename = report.get("filename", "report") if report else "report"
+    original_filename = report.get("filename", "report")
     
     return FileResponse(
         path=file_path,
@@ -3,6 +3,7 @@ AI Chat Service - Handles AI chat with memory for doctor consultations.
 Uses Gemini API for generating responses with full patient context.
 """
 
+import time
 import uuid
 from typing import Optional, Dict, List, Any
 from datetime import datetime
@@ -42,6 +43,11 @@ else:
     print(f"[AI Service] Gemini not configured: AVAILABLE={GEMINI_AVAILABLE}, HAS_KEY={bool(GEMINI_API_KEY)}")
 
 
+def _message_id() -> str:
+    """Time-ordered chat message id, so inserts append to the primary-key index."""
+    return f"msg_{time.time_ns() // 1_000_000:012x}{uuid.uuid4().hex[:8]}"
+
+
 class AIChatService:
     """Service for AI-powered chat during consultations."""
     
@@ -94,7 +100,7 @@ class AIChatService:
         
         # Store doctor's message
         doctor_message = {
-            "id": f"msg_{uuid.uuid4().hex[:12]}",
+            "id": _message_id(),
             "session_id": session["id"],
             "role": "doctor",
             "content": message,
@@ -119,7 +125,7 @@ class AIChatService:
         
         # Store AI response
         ai_message = {
-            "id": f"msg_{uuid.uuid4().hex[:12]}",
+            "id": _message_id(),
             "session_id": session["id"],
             "role": "assistant",
             "content": response_content,
@@ -268,8 +274,7 @@ def generate_comprehensive_analysis(
     pdf_service = get_pdf_service()
     
     # Check if analysis already exists
-    existing = db.get_ai_analysis_by_consultation(consultation_id)
-    if existing:
+    if db.has_ai_analysis(consultation_id):
         print(f"[AI Analysis] Found existing analysis for consultation {consultation_id}")
         # Return existing - but allow regeneration by removing this if user wants fresh analysis
     
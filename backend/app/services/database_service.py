@@ -6,14 +6,15 @@ Drop-in replacement for firebase_service.py with identical interface.
 
 from typing import Optional, Dict, List
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, undefer_group
 
 from app.database import SessionLocal, init_db
 from app.sql_models import (
     Doctor, Patient, DemoPatient, DoctorProfile, Follow,
     Appointment, PatientProfileRecord, DoctorSettings, PatientReputation,
     Consultation, Message, DoctorNote, Prescription,
-    AIAnalysisResult, AIChatSession, AIChatMessage
+    AIAnalysisResult, AIChatSession, AIChatMessage, DOCTOR_DETAIL_OPTIONS
 )
 
 
@@ -340,7 +341,12 @@ class DatabaseService:
                 following_id=follow_data["following_id"]
             )
             session.add(follow)
-            session.commit()
+            try:
+                session.commit()
+            except IntegrityError:
+                # Already following (e.g. a double-submitted follow): the
+                # unique pair constraint makes the insert a no-op
+                session.rollback()
             return follow_data
         finally:
             session.close()
@@ -362,10 +368,10 @@ class DatabaseService:
         """Check if one doctor follows another."""
         session = self._get_session()
         try:
-            return session.query(Follow).filter(
+            return session.query(Follow.id).filter(
                 Follow.follower_id == follower_id,
                 Follow.following_id == following_id
-            ).count() > 0
+            ).first() is not None
         finally:
             session.close()
     
@@ -785,7 +791,9 @@ class DatabaseService:
         """Search for doctors with filters, including profile and settings data."""
         session = self._get_session()
         try:
-            query = session.query(Doctor)
+            # Profiles and settings come in with the doctors (selectinload),
+            # not as two extra queries per doctor
+            query = session.query(Doctor).options(*DOCTOR_DETAIL_OPTIONS)
             
             if filters.get("specialization"):
                 query = query.filter(Doctor.specialization == filters["specialization"])
@@ -804,8 +812,8 @@ class DatabaseService:
                 # Convert doctor to dict
                 doctor_dict = self._doctor_to_dict(d)
                 
-                # Fetch profile data
-                profile = session.query(DoctorProfile).filter(DoctorProfile.doctor_id == d.id).first()
+                # Profile data
+                profile = d.profile
                 if profile:
                     doctor_dict["years_experience"] = profile.experience_years
                     doctor_dict["experience"] = profile.experience_years
@@ -813,8 +821,8 @@ class DatabaseService:
                     doctor_dict["qualifications"] = profile.qualifications
                     doctor_dict["profile_photo_url"] = profile.profile_photo_url
                 
-                # Fetch settings data
-                settings = session.query(DoctorSettings).filter(DoctorSettings.doctor_id == d.id).first()
+                # Settings data
+                settings = d.settings
                 if settings:
                     doctor_dict["online_fee"] = settings.online_consultation_fee
                     doctor_dict["offline_fee"] = settings.offline_consultation_fee
@@ -1186,7 +1194,7 @@ class DatabaseService:
         session = self._get_session()
         try:
             # Check if analysis already exists for this consultation
-            existing = session.query(AIAnalysisResult).filter(
+            existing = session.query(AIAnalysisResult).options(undefer_group("payload")).filter(
                 AIAnalysisResult.consultation_id == analysis_data.get("consultation_id")
             ).first()
             
@@ -1196,8 +1204,12 @@ class DatabaseService:
                     if hasattr(existing, key) and key != 'id':
                         setattr(existing, key, value)
                 existing.updated_at = datetime.utcnow()
+                # Build the result from the flushed object: after commit it
+                # would be expired and reloaded (payload columns separately)
+                session.flush()
+                result = self._analysis_to_dict(existing)
                 session.commit()
-                return self._analysis_to_dict(existing)
+                return result
             
             # Create new
             analysis = AIAnalysisResult(
@@ -1217,8 +1229,10 @@ class DatabaseService:
                 context_size=analysis_data.get("context_size", 0)
             )
             session.add(analysis)
+            session.flush()
+            result = self._analysis_to_dict(analysis)
             session.commit()
-            return self._analysis_to_dict(analysis)
+            return result
         finally:
             session.close()
     
@@ -1226,13 +1240,23 @@ class DatabaseService:
         """Get AI analysis for a consultation."""
         session = self._get_session()
         try:
-            analysis = session.query(AIAnalysisResult).filter(
+            analysis = session.query(AIAnalysisResult).options(undefer_group("payload")).filter(
                 AIAnalysisResult.consultation_id == consultation_id
             ).first()
             return self._analysis_to_dict(analysis) if analysis else None
         finally:
             session.close()
     
+    def has_ai_analysis(self, consultation_id: str) -> bool:
+        """Check whether a consultation has an AI analysis, without loading it."""
+        session = self._get_session()
+        try:
+            return session.query(AIAnalysisResult.id).filter(
+                AIAnalysisResult.consultation_id == consultation_id
+            ).first() is not None
+        finally:
+            session.close()
+    
     def _analysis_to_dict(self, analysis: AIAnalysisResult) -> dict:
         """Convert AIAnalysisResult to dictionary."""
         return {
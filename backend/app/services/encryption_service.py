@@ -8,6 +8,7 @@ import base64
 import hashlib
 import hmac
 import secrets
+import time
 from typing import Tuple, Optional
 from datetime import datetime
 
@@ -169,8 +170,10 @@ class EncryptionService:
         return hashlib.sha256(file_content).hexdigest()
     
     def generate_message_id(self) -> str:
-        """Generate a unique message ID."""
-        return f"msg_{secrets.token_hex(16)}"
+        """Generate a unique, time-ordered message ID."""
+        # Millisecond timestamp first: new messages append to the end of the
+        # primary-key index instead of landing on random pages
+        return f"msg_{time.time_ns() // 1_000_000:012x}{secrets.token_hex(10)}"
     
     def generate_consultation_id(self) -> str:
         """Generate a unique consultation ID."""
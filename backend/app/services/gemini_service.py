@@ -386,7 +386,6 @@ Provide:
         if not self.model:
             return "Error: Gemini API key not configured"
         
-        import base64
         from PIL import Image
         import io
         
@@ -433,7 +432,6 @@ Return only the extracted text, no commentary."""
         if not self.model:
             return {"error": "Gemini API key not configured", "success": False}
         
-        import base64
         from PIL import Image
         import io
         
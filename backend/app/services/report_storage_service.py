@@ -1,72 +1,554 @@
 """
 Report Storage Service
 Stores extracted patient report data as JSON files for future reference.
+
+Each patient has an append-only newline-delimited JSON log holding one
+report per line, oldest first, sharded into fixed-size segments under
+logs/<safe_id>/NNNNNN.ndjson. New reports go to the last segment.
+Deletions append a tombstone line ({"deleted": report_id}) to the
+report's segment, and only that segment is compacted once its tombstones
+outnumber its live reports.
+
+Lines are compact JSON; to inspect a segment by hand use
+`python -m json.tool --json-lines <segment>`.
 """
+import asyncio
+import hashlib
 import json
+import mmap
+import os
+import shutil
+import time
 import uuid
-from datetime import datetime
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Dict
+
+# Fast JSON codecs (optional): orjson, then msgspec, then stdlib json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgspec
+    _msgspec_encoder = msgspec.json.Encoder(enc_hook=str)
+    _msgspec_decoder = msgspec.json.Decoder()
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+# Errors raised for a malformed log line by whichever codec is active
+_DECODE_ERRORS = (ValueError, msgspec.DecodeError) if MSGSPEC_AVAILABLE else (ValueError,)
+
+
+def _dumps(obj) -> bytes:
+    """Serialize one log record to compact JSON bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=str)
+    if MSGSPEC_AVAILABLE:
+        return _msgspec_encoder.encode(obj)
+    return json.dumps(obj, default=str, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _loads(raw: bytes):
+    """Parse one log record."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    if MSGSPEC_AVAILABLE:
+        return _msgspec_decoder.decode(raw)
+    return json.loads(raw)
+
+
+def _write_all(fd: int, content: bytes):
+    """os.write until every byte is written (handles short writes)."""
+    view = memoryview(content)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _write_file_bytes(path, content: bytes, fsync: bool = False):
+    """
+    Write a whole file with raw fd syscalls, bypassing the buffered file object.
+    
+    Space is preallocated with posix_fallocate where available (not on
+    macOS/Windows) to avoid extent churn on large uploads.
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(path, flags, 0o644)
+    try:
+        if content and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(fd, 0, len(content))
+            except OSError:
+                pass  # Filesystem does not support preallocation
+        _write_all(fd, content)
+        if fsync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _append_file_bytes(path, content: bytes):
+    """
+    Append lines to a file through an O_APPEND fd (one write for small payloads).
+    
+    If the file does not end in a newline (a torn line from an interrupted
+    append), a newline is written first so the new lines are not merged
+    into the torn one and dropped with it on replay.
+    """
+    flags = os.O_RDWR | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0)
+    fd = os.open(path, flags, 0o644)
+    try:
+        if os.fstat(fd).st_size:
+            os.lseek(fd, -1, os.SEEK_END)
+            if os.read(fd, 1) != b"\n":
+                content = b"\n" + content
+        _write_all(fd, content)
+    finally:
+        os.close(fd)
+
+
+def _read_file_bytes(path) -> bytes:
+    """Read a whole file as bytes (raw, unbuffered read)."""
+    with open(path, 'rb', buffering=0) as f:
+        return f.readall()
+
+
+def _uuid7(timestamp_ms: Optional[int] = None) -> str:
+    """
+    Time-ordered UUID (RFC 9562 version 7) as a string.
+    
+    48-bit Unix millisecond timestamp followed by random bits, so ids sort
+    in creation order and keep the same textual shape as uuid4 ids.
+    """
+    if timestamp_ms is None:
+        timestamp_ms = time.time_ns() // 1_000_000
+    value = (timestamp_ms & 0xFFFFFFFFFFFF) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 4122 variant
+    return str(uuid.UUID(int=value))
+
 
 class ReportStorageService:
     """Store extracted report data as JSON files per patient."""
     
-    def __init__(self):
-        self.storage_dir = Path(__file__).parent.parent / "data" / "patient_reports"
+    __slots__ = (
+        "storage_dir", "files_dir", "blobs_dir", "logs_dir",
+        "_files_dir_str", "_blobs_dir_str", "_logs_dir_str",
+        "_cache", "_cache_lock", "_write_lock", "_safe_ids", "_patient_dirs",
+        "_prefetch_pool", "_prefetches",
+    )
+    
+    # Max number of patients whose parsed data is kept in memory
+    CACHE_MAX_PATIENTS = 512
+    # Report lines per log segment before rolling over to a new one
+    SEGMENT_MAX_REPORTS = 100
+    # Segments at least this large are searched via mmap instead of read()
+    MMAP_MIN_BYTES = 64 * 1024
+    # fsync log rewrites before swapping them in (off: the log is not a WAL)
+    FSYNC_REWRITES = False
+    # Single-pass replacement table for _sanitize_id
+    _SANITIZE_TABLE = str.maketrans({"@": "_at_", ".": "_", "/": "_"})
+    
+    def __init__(self, storage_dir: Optional[Path] = None):
+        self.storage_dir = storage_dir or Path(__file__).parent.parent / "data" / "patient_reports"
         self.storage_dir.mkdir(parents=True, exist_ok=True)
         # Directory for storing original files
         self.files_dir = self.storage_dir / "files"
         self.files_dir.mkdir(parents=True, exist_ok=True)
+        # Content-addressed store the per-report files are hardlinked to
+        self.blobs_dir = self.storage_dir / "blobs"
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        # Directory for per-patient sharded report logs
+        self.logs_dir = self.storage_dir / "logs"
+        self.logs_dir.mkdir(parents=True, exist_ok=True)
+        # String prefixes so hot-path helpers avoid Path arithmetic per call
+        self._files_dir_str = str(self.files_dir)
+        self._blobs_dir_str = str(self.blobs_dir)
+        self._logs_dir_str = str(self.logs_dir)
+        # Parsed patient data keyed by patient_id -> (segment signature, data)
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Serializes load + append + cache update for concurrent writers, and
+        # legacy-file migration (re-entrant: writers load, which may migrate)
+        self._write_lock = threading.RLock()
+        # Memoized patient_id -> sanitized id (bounded like the data cache)
+        self._safe_ids: dict = {}
+        # Memoized patient_id -> segment directory path (same bound)
+        self._patient_dirs: dict = {}
+        # In-flight background loads started by prefetch(), keyed by patient_id
+        self._prefetch_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="report-prefetch")
+        self._prefetches: dict = {}
     
     def _sanitize_id(self, patient_id: str) -> str:
         """Sanitize patient_id for filesystem use."""
-        return patient_id.replace("@", "_at_").replace(".", "_").replace("/", "_")
+        safe_id = self._safe_ids.get(patient_id)
+        if safe_id is None:
+            if len(self._safe_ids) >= self.CACHE_MAX_PATIENTS:
+                self._safe_ids.clear()
+            safe_id = patient_id.translate(self._SANITIZE_TABLE)
+            self._safe_ids[patient_id] = safe_id
+        return safe_id
     
     def _get_patient_file(self, patient_id: str) -> Path:
-        """Get the JSON file path for a patient."""
+        """Get the legacy (pre-NDJSON) JSON file path for a patient."""
         safe_id = self._sanitize_id(patient_id)
         return self.storage_dir / f"{safe_id}.json"
     
-    def _get_file_storage_path(self, patient_id: str, report_id: str, filename: str) -> Path:
+    def _get_patient_dir(self, patient_id: str) -> str:
+        """Get the directory holding a patient's log segments."""
+        patient_dir = self._patient_dirs.get(patient_id)
+        if patient_dir is None:
+            if len(self._patient_dirs) >= self.CACHE_MAX_PATIENTS:
+                self._patient_dirs.clear()
+            patient_dir = os.path.join(self._logs_dir_str, self._sanitize_id(patient_id))
+            self._patient_dirs[patient_id] = patient_dir
+        return patient_dir
+    
+    @staticmethod
+    def _segment_name(seq: int) -> str:
+        """File name of the seq-th log segment (zero-padded so names sort)."""
+        return f"{seq:06d}.ndjson"
+    
+    def _get_file_storage_path(self, patient_id: str, report_id: str, filename: str) -> str:
         """Get the path for storing an original file."""
         safe_id = self._sanitize_id(patient_id)
         # Create patient subdirectory
-        patient_files_dir = self.files_dir / safe_id
-        patient_files_dir.mkdir(parents=True, exist_ok=True)
+        patient_files_dir = os.path.join(self._files_dir_str, safe_id)
+        os.makedirs(patient_files_dir, exist_ok=True)
         # Use report_id as prefix to avoid filename collisions
-        return patient_files_dir / f"{report_id}_{filename}"
+        return os.path.join(patient_files_dir, f"{report_id}_{filename}")
+    
+    def _cache_get(self, patient_id: str, signature: tuple) -> Optional[dict]:
+        """Return cached data if it was parsed from the log at signature."""
+        with self._cache_lock:
+            entry = self._cache.get(patient_id)
+            if entry is None or entry[0] != signature:
+                return None
+            self._cache.move_to_end(patient_id)
+            return entry[1]
+    
+    def _cache_put(self, patient_id: str, signature: tuple, data: dict):
+        """Cache parsed data, evicting the least recently used patient."""
+        with self._cache_lock:
+            self._cache[patient_id] = (signature, data)
+            self._cache.move_to_end(patient_id)
+            while len(self._cache) > self.CACHE_MAX_PATIENTS:
+                self._cache.popitem(last=False)
+    
+    def _log_signature(self, patient_dir: str) -> tuple:
+        """
+        Sorted (name, mtime_ns, size) of every segment in the patient directory.
+        
+        Size catches appends within one mtime tick. Raises FileNotFoundError
+        if the directory does not exist yet.
+        """
+        signature = []
+        with os.scandir(patient_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".ndjson"):
+                    st = entry.stat()
+                    signature.append((entry.name, st.st_mtime_ns, st.st_size))
+        return tuple(sorted(signature))
+    
+    def _new_patient_data(self, patient_id: str) -> dict:
+        """
+        Build an empty in-memory patient structure.
+        
+        "index" maps report_id to its entry, "segment_of" maps report_id to
+        the segment holding it, and "segments" tracks live/tombstone line
+        counts per segment in name order.
+        """
+        return {
+            "patient_id": patient_id,
+            "reports": [],
+            "index": {},
+            "segment_of": {},
+            "segments": {}
+        }
+    
+    def _parse_segment(self, raw: bytes) -> tuple:
+        """Replay one log segment into (live reports, tombstone count)."""
+        reports = []
+        deleted = set()
+        for line in raw.splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = _loads(line)
+            except _DECODE_ERRORS:
+                # Torn trailing line from an interrupted append
+                continue
+            if "deleted" in record:
+                deleted.add(record["deleted"])
+            else:
+                reports.append(record)
+        if deleted:
+            reports = [r for r in reports if r.get("report_id") not in deleted]
+        return reports, len(deleted)
+    
+    def _add_segment(self, data: dict, segment: str, reports: List[dict], tombstones: int = 0):
+        """Merge a parsed segment into the patient structure (segments in order)."""
+        data["segments"][segment] = {"reports": len(reports), "tombstones": tombstones}
+        for report in reports:
+            report_id = report.get("report_id")
+            data["reports"].append(report)
+            data["index"][report_id] = report
+            data["segment_of"][report_id] = segment
+    
+    def _write_segment(self, segment_path: str, reports: List[dict]):
+        """
+        Write a whole segment with only live reports (migration/compaction).
+        
+        The payload goes to a temp file in one write and is swapped in with
+        os.replace, so readers and crashes never observe a truncated segment.
+        """
+        tmp_path = segment_path + ".tmp"
+        payload = b"".join(_dumps(report) + b"\n" for report in reports)
+        _write_file_bytes(tmp_path, payload, fsync=self.FSYNC_REWRITES)
+        os.replace(tmp_path, segment_path)
+    
+    def _migrate_legacy_file(self, patient_id: str) -> bool:
+        """
+        Convert a legacy <safe_id>.json file into log segments.
+        
+        Runs under the write lock, so a concurrent save waits for it instead
+        of appending to a half-built log, and re-checks both paths once the
+        lock is held since another thread may have migrated meanwhile. The
+        segments are built in a temp directory that is renamed into place,
+        so the patient directory only ever appears complete.
+        
+        Returns True if the patient now has a log directory.
+        """
+        patient_dir = self._get_patient_dir(patient_id)
+        legacy_path = self._get_patient_file(patient_id)
+        with self._write_lock:
+            if os.path.isdir(patient_dir):
+                return True
+            if not legacy_path.exists():
+                return False
+            legacy = _loads(legacy_path.read_bytes())
+            # Legacy files store newest first; the log is oldest first
+            reports = list(reversed(legacy.get("reports", [])))
+            
+            tmp_dir = f"{patient_dir}.migrating.{os.getpid()}"
+            shutil.rmtree(tmp_dir, ignore_errors=True)  # Left by a crashed migration
+            os.makedirs(tmp_dir)
+            for seq, start in enumerate(range(0, len(reports), self.SEGMENT_MAX_REPORTS)):
+                chunk = reports[start:start + self.SEGMENT_MAX_REPORTS]
+                self._write_segment(os.path.join(tmp_dir, self._segment_name(seq)), chunk)
+            try:
+                os.rename(tmp_dir, patient_dir)
+            except OSError:
+                # Another process migrated first; its log is authoritative
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                if not os.path.isdir(patient_dir):
+                    raise
+            legacy_path.unlink(missing_ok=True)
+            return True
+    
+    def _patient_signature(self, patient_id: str) -> tuple:
+        """Return (patient_dir, segment signature), or signature None if no log exists."""
+        patient_dir = self._get_patient_dir(patient_id)
+        try:
+            return patient_dir, self._log_signature(patient_dir)
+        except FileNotFoundError:
+            if not self._migrate_legacy_file(patient_id):
+                return patient_dir, None
+            return patient_dir, self._log_signature(patient_dir)
+    
+    def _iter_lines_containing(self, segment_path: str, needle: bytes):
+        """
+        Yield the segment's lines containing needle, last line first.
+        
+        Large segments are mapped and searched with rfind, so only matching
+        lines are copied out of the page cache instead of the whole file.
+        """
+        with open(segment_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < self.MMAP_MIN_BYTES:
+                for line in reversed(f.read().splitlines()):
+                    if needle in line:
+                        yield line
+                return
+            
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = size
+                while True:
+                    pos = mm.rfind(needle, 0, end)
+                    if pos < 0:
+                        return
+                    start = mm.rfind(b"\n", 0, pos) + 1
+                    stop = mm.find(b"\n", pos)
+                    yield mm[start:stop if stop >= 0 else size]
+                    end = start
+    
+    def _scan_for_report(self, patient_dir: str, signature: tuple, report_id: str) -> Optional[dict]:
+        """
+        Find one report without replaying the whole log (cold-cache path).
+        
+        Segments and their lines are walked newest first, and only lines
+        containing the id are parsed. A report's tombstone lives in its own
+        segment after the entry, so the first parsed match decides.
+        """
+        needle = report_id.encode("utf-8")
+        for segment, _, _ in reversed(signature):
+            for line in self._iter_lines_containing(os.path.join(patient_dir, segment), needle):
+                try:
+                    record = _loads(line)
+                except _DECODE_ERRORS:
+                    continue
+                if record.get("deleted") == report_id:
+                    return None
+                if record.get("report_id") == report_id:
+                    return record
+        return None
     
     def _load_patient_data(self, patient_id: str) -> dict:
-        """Load existing patient report data or return empty structure."""
-        file_path = self._get_patient_file(patient_id)
-        if file_path.exists():
-            with open(file_path, 'r') as f:
-                return json.load(f)
-        return {"patient_id": patient_id, "reports": []}
-    
-    def _save_patient_data(self, patient_id: str, data: dict):
-        """Save patient report data to JSON file."""
-        file_path = self._get_patient_file(patient_id)
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
+        """
+        Load existing patient report data or return empty structure.
+        
+        Reports are returned oldest first, with an "index" dict mapping
+        report_id to its entry. The result is cached per patient and
+        revalidated against the segments' names, mtimes and sizes, so
+        repeated lookups skip the parse. Callers must treat it as read-only
+        unless they persist their change through the log.
+        """
+        patient_dir, signature = self._patient_signature(patient_id)
+        if signature is None:
+            return self._new_patient_data(patient_id)
+        
+        cached = self._cache_get(patient_id, signature)
+        if cached is not None:
+            return cached
+        
+        data = self._new_patient_data(patient_id)
+        for segment, _, _ in signature:
+            raw = _read_file_bytes(os.path.join(patient_dir, segment))
+            reports, tombstones = self._parse_segment(raw)
+            self._add_segment(data, segment, reports, tombstones)
+        self._cache_put(patient_id, signature, data)
+        return data
+    
+    def prefetch(self, patient_id: str):
+        """
+        Start loading a patient's reports in the background.
+        
+        Route handlers call this as soon as the patient is known so the log
+        is parsed while OCR/Gemini work runs; the later save or lookup then
+        hits the warm cache instead of parsing on the request path.
+        """
+        if patient_id in self._prefetches:
+            return
+        future = self._prefetch_pool.submit(self._load_patient_data, patient_id)
+        self._prefetches[patient_id] = future
+        
+        def _forget(done, patient_id=patient_id):
+            if self._prefetches.get(patient_id) is done:
+                del self._prefetches[patient_id]
+        
+        future.add_done_callback(_forget)
+    
+    def _await_prefetch(self, patient_id: str):
+        """Wait for an in-flight prefetch so its parse is reused, not repeated."""
+        future = self._prefetches.get(patient_id)
+        if future is not None:
+            try:
+                future.result()
+            except Exception:
+                pass  # Fall back to a synchronous load
+    
+    def _active_segment(self, data: dict) -> str:
+        """Return the segment new reports are appended to, rolling over when full."""
+        segments = data["segments"]
+        if not segments:
+            return self._segment_name(0)
+        last = next(reversed(segments))
+        counts = segments[last]
+        if counts["reports"] + counts["tombstones"] < self.SEGMENT_MAX_REPORTS:
+            return last
+        return self._segment_name(int(last.split(".")[0]) + 1)
+    
+    def _append_records(self, patient_id: str, segment: str, records: List[dict]):
+        """Append records to one log segment in a single write."""
+        patient_dir = self._get_patient_dir(patient_id)
+        os.makedirs(patient_dir, exist_ok=True)
+        payload = b"".join(_dumps(record) + b"\n" for record in records)
+        _append_file_bytes(os.path.join(patient_dir, segment), payload)
+    
+    def _recache(self, patient_id: str, data: dict):
+        """Re-key the cache on the log's new signature so the next load skips the parse."""
+        self._cache_put(patient_id, self._log_signature(self._get_patient_dir(patient_id)), data)
+    
+    def _compact_segment(self, patient_id: str, data: dict, segment: str, deleted_id: str):
+        """Rewrite one segment without its deleted reports (or drop it if empty)."""
+        patient_dir = self._get_patient_dir(patient_id)
+        segment_of = data["segment_of"]
+        live = [
+            r for r in data["reports"]
+            if segment_of.get(r.get("report_id")) == segment and r.get("report_id") != deleted_id
+        ]
+        if live:
+            self._write_segment(os.path.join(patient_dir, segment), live)
+            data["segments"][segment] = {"reports": len(live), "tombstones": 0}
+        else:
+            os.unlink(os.path.join(patient_dir, segment))
+            del data["segments"][segment]
+    
+    def _store_blob(self, content: bytes) -> str:
+        """
+        Store content once under blobs/<sha256[:2]>/<sha256> and return its path.
+        
+        Re-uploads of identical files skip the write entirely. New blobs are
+        written to a temp name and renamed so concurrent writers never link a
+        partial blob.
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        blob_dir = os.path.join(self._blobs_dir_str, digest[:2])
+        blob_path = os.path.join(blob_dir, digest)
+        if not os.path.exists(blob_path):
+            os.makedirs(blob_dir, exist_ok=True)
+            tmp_path = f"{blob_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            _write_file_bytes(tmp_path, content)
+            os.replace(tmp_path, blob_path)
+        return blob_path
     
     def save_file(self, patient_id: str, report_id: str, filename: str, content: bytes) -> str:
         """
         Save the original uploaded file.
         
+        The per-report path is a hardlink to a content-addressed blob, so
+        duplicate uploads share one copy on disk.
+        
         Args:
             patient_id: The patient's unique identifier
             report_id: The report ID
             filename: Original filename
             content: File content as bytes
-            
+        
         Returns:
             The relative path to the stored file
         """
         file_path = self._get_file_storage_path(patient_id, report_id, filename)
-        with open(file_path, 'wb') as f:
-            f.write(content)
-        return str(file_path)
+        blob_path = self._store_blob(content)
+        if os.path.lexists(file_path):
+            os.unlink(file_path)
+        try:
+            os.link(blob_path, file_path)
+        except OSError:
+            # Filesystem without hardlink support: keep a private copy
+            _write_file_bytes(file_path, content)
+        return file_path
+    
+    def _find_report_in(self, data: dict, report_id: str) -> Optional[dict]:
+        """Find a report in already-loaded patient data."""
+        return data["index"].get(report_id)
     
     def get_file_path(self, patient_id: str, report_id: str) -> Optional[Path]:
         """Get the stored file path for a report."""
@@ -74,7 +556,56 @@ class ReportStorageService:
         if report and report.get("file_path"):
             return Path(report["file_path"])
         return None
-
+    
+    def get_file_paths(self, patient_id: str, report_ids: List[str]) -> Dict[str, Optional[Path]]:
+        """Get stored file paths for several reports with a single load."""
+        patient_data = self._load_patient_data(patient_id)
+        paths = {}
+        for report_id in report_ids:
+            report = self._find_report_in(patient_data, report_id)
+            paths[report_id] = Path(report["file_path"]) if report and report.get("file_path") else None
+        return paths
+    
+    def _build_report_entry(self, patient_id: str, report_data: dict, has_file: bool) -> dict:
+        """Create the log entry for a new report (file_path is precomputed)."""
+        # One clock read shared by the id's timestamp and created_at
+        now = datetime.now(timezone.utc)
+        report_id = _uuid7(int(now.timestamp() * 1000))
+        filename = report_data.get("filename", "unknown")
+        file_path = None
+        if has_file:
+            file_path = self._get_file_storage_path(patient_id, report_id, filename)
+        
+        return {
+            "report_id": report_id,
+            "created_at": now.replace(tzinfo=None).isoformat(),  # naive UTC, as before
+            "filename": filename,
+            "file_path": file_path,
+            "interpretation": report_data.get("interpretation", ""),
+            "results": report_data.get("results", []),
+            "overall_summary": report_data.get("overall_summary", ""),
+            "questions_for_doctor": report_data.get("questions_for_doctor", []),
+            "extracted_text_preview": report_data.get("extracted_text_preview", "")
+        }
+    
+    def _append_report(self, patient_id: str, report_entry: dict):
+        """Append a report entry to the patient log; cost is independent of history."""
+        self._await_prefetch(patient_id)
+        with self._write_lock:
+            # Load existing data (cached) so it can be kept in sync with the append
+            patient_data = self._load_patient_data(patient_id)
+            segment = self._active_segment(patient_data)
+            self._append_records(patient_id, segment, [report_entry])
+            
+            # The cached data only changes once the entry is on disk
+            report_id = report_entry["report_id"]
+            patient_data["reports"].append(report_entry)
+            patient_data["index"][report_id] = report_entry
+            patient_data["segment_of"][report_id] = segment
+            counts = patient_data["segments"].setdefault(segment, {"reports": 0, "tombstones": 0})
+            counts["reports"] += 1
+            self._recache(patient_id, patient_data)
+    
     def save_report(self, patient_id: str, report_data: dict, file_content: bytes = None) -> str:
         """
         Save an interpreted report for a patient.
@@ -83,70 +614,89 @@ class ReportStorageService:
             patient_id: The patient's unique identifier
             report_data: The extracted and interpreted report data
             file_content: Optional original file content to store
-            
+        
         Returns:
             The generated report_id
         """
-        report_id = str(uuid.uuid4())
-        
-        # Load existing data
-        patient_data = self._load_patient_data(patient_id)
-        
-        filename = report_data.get("filename", "unknown")
+        report_entry = self._build_report_entry(patient_id, report_data, bool(file_content))
+        report_id = report_entry["report_id"]
         
         # Save original file if provided
-        file_path = None
         if file_content:
-            file_path = self.save_file(patient_id, report_id, filename, file_content)
+            self.save_file(patient_id, report_id, report_entry["filename"], file_content)
         
-        # Add new report with metadata
-        report_entry = {
-            "report_id": report_id,
-            "created_at": datetime.utcnow().isoformat(),
-            "filename": filename,
-            "file_path": file_path,
-            "interpretation": report_data.get("interpretation", ""),
-            "results": report_data.get("results", []),
-            "overall_summary": report_data.get("overall_summary", ""),
-            "questions_for_doctor": report_data.get("questions_for_doctor", []),
-            "extracted_text_preview": report_data.get("extracted_text_preview", "")
-        }
+        self._append_report(patient_id, report_entry)
         
-        patient_data["reports"].insert(0, report_entry)  # Add to beginning
-        patient_data["updated_at"] = datetime.utcnow().isoformat()
+        return report_id
+    
+    async def save_report_async(self, patient_id: str, report_data: dict, file_content: bytes = None) -> str:
+        """
+        Async variant of save_report for request handlers.
         
-        # Save updated data
-        self._save_patient_data(patient_id, patient_data)
+        Both writes run on worker threads so they don't block the event
+        loop. As in save_report, the original file is written first and the
+        log entry only once that succeeds, so a failed upload never leaves
+        an entry whose file_path points at nothing.
+        """
+        report_entry = self._build_report_entry(patient_id, report_data, bool(file_content))
+        report_id = report_entry["report_id"]
+        
+        if file_content:
+            await asyncio.to_thread(
+                self.save_file, patient_id, report_id, report_entry["filename"], file_content
+            )
+        await asyncio.to_thread(self._append_report, patient_id, report_entry)
         
         return report_id
     
     def get_patient_reports(self, patient_id: str) -> List[dict]:
-        """Get all reports for a patient."""
+        """Get all reports for a patient, newest first."""
+        self._await_prefetch(patient_id)
         patient_data = self._load_patient_data(patient_id)
-        return patient_data.get("reports", [])
+        return patient_data["reports"][::-1]
     
     def get_report(self, patient_id: str, report_id: str) -> Optional[dict]:
         """Get a specific report by ID."""
-        reports = self.get_patient_reports(patient_id)
-        for report in reports:
-            if report.get("report_id") == report_id:
-                return report
-        return None
+        self._await_prefetch(patient_id)
+        patient_dir, signature = self._patient_signature(patient_id)
+        if signature is None:
+            return None
+        
+        cached = self._cache_get(patient_id, signature)
+        if cached is not None:
+            return self._find_report_in(cached, report_id)
+        # Not cached: scan for the one report instead of parsing the history
+        return self._scan_for_report(patient_dir, signature, report_id)
     
     def delete_report(self, patient_id: str, report_id: str) -> bool:
         """Delete a specific report."""
-        patient_data = self._load_patient_data(patient_id)
-        original_count = len(patient_data.get("reports", []))
-        
-        patient_data["reports"] = [
-            r for r in patient_data.get("reports", [])
-            if r.get("report_id") != report_id
-        ]
-        
-        if len(patient_data["reports"]) < original_count:
-            self._save_patient_data(patient_id, patient_data)
+        with self._write_lock:
+            patient_data = self._load_patient_data(patient_id)
+            entry = self._find_report_in(patient_data, report_id)
+            if entry is None:
+                return False
+            
+            # Disk first: the cached data only changes once the delete is persisted
+            segment = patient_data["segment_of"][report_id]
+            counts = patient_data["segments"][segment]
+            if counts["tombstones"] + 1 > counts["reports"] - 1:
+                # Mostly dead lines: compact this segment only
+                self._compact_segment(patient_id, patient_data, segment, report_id)
+            else:
+                self._append_records(patient_id, segment, [{"deleted": report_id}])
+                counts["reports"] -= 1
+                counts["tombstones"] += 1
+            
+            del patient_data["index"][report_id]
+            del patient_data["segment_of"][report_id]
+            # Remove in place; order is kept since listings are shown as stored
+            reports = patient_data["reports"]
+            for i, report in enumerate(reports):
+                if report is entry:
+                    del reports[i]
+                    break
+            self._recache(patient_id, patient_data)
             return True
-        return False
 
 
 # Singleton instance
@@ -3,8 +3,8 @@ SQLAlchemy ORM Models
 Database models for all MedVision AI entities.
 """
 
-from sqlalchemy import Column, String, Integer, Float, Boolean, Text, DateTime, JSON, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Integer, Float, Boolean, Text, DateTime, JSON, ForeignKey, Index
+from sqlalchemy.orm import deferred, relationship, selectinload
 from datetime import datetime
 
 from app.database import Base
@@ -36,9 +36,12 @@ class Doctor(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Relationships
-    profile = relationship("DoctorProfile", back_populates="doctor", uselist=False)
-    settings = relationship("DoctorSettings", back_populates="doctor", uselist=False)
+    # Relationships. Like every relationship in this module they are
+    # lazy="raise_on_sql": a lazy load that would emit a query raises, so
+    # listings must use DOCTOR_DETAIL_OPTIONS (or lazyload() to opt back in)
+    # instead of one SELECT per doctor per relationship
+    profile = relationship("DoctorProfile", back_populates="doctor", uselist=False, lazy="raise_on_sql")
+    settings = relationship("DoctorSettings", back_populates="doctor", uselist=False, lazy="raise_on_sql")
 
 
 class Patient(Base):
@@ -107,15 +110,21 @@ class DoctorProfile(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationship
-    doctor = relationship("Doctor", back_populates="profile")
+    doctor = relationship("Doctor", back_populates="profile", lazy="raise_on_sql")
 
 
 class Follow(Base):
     """Follow relationships between doctors."""
     __tablename__ = "follows"
+    # One row per (follower, followed) pair; its index also answers
+    # is_following and follower_id lookups. A unique index rather than a
+    # table constraint, so init_db can add it to existing databases.
+    __table_args__ = (
+        Index("uq_follow_pair", "follower_id", "following_id", unique=True),
+    )
     
     id = Column(String(100), primary_key=True)
-    follower_id = Column(String(50), index=True)
+    follower_id = Column(String(50))
     following_id = Column(String(50), index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -123,10 +132,18 @@ class Follow(Base):
 class Appointment(Base):
     """Appointments between patients and doctors."""
     __tablename__ = "appointments"
+    # Match the lookups in database_service: a doctor's queue for a day,
+    # a doctor's appointments by status, a patient's appointments by status.
+    # Their leading columns also serve plain patient_id/doctor_id filters.
+    __table_args__ = (
+        Index("ix_appt_doc_queue", "doctor_id", "queue_date", "queue_number"),
+        Index("ix_appt_doc_status", "doctor_id", "status"),
+        Index("ix_appt_patient_status", "patient_id", "status"),
+    )
     
     id = Column(String(50), primary_key=True)
-    patient_id = Column(String(50), index=True)
-    doctor_id = Column(String(50), index=True)
+    patient_id = Column(String(50))
+    doctor_id = Column(String(50))
     status = Column(String(20), default="pending")
     mode = Column(String(20))  # online/offline
     
@@ -225,7 +242,7 @@ class DoctorSettings(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationship
-    doctor = relationship("Doctor", back_populates="settings")
+    doctor = relationship("Doctor", back_populates="settings", lazy="raise_on_sql")
 
 
 class PatientReputation(Base):
@@ -277,9 +294,13 @@ class Consultation(Base):
 class Message(Base):
     """Chat messages during consultation."""
     __tablename__ = "messages"
+    # Chat history is read per consultation in timestamp order
+    __table_args__ = (
+        Index("ix_messages_consultation_time", "consultation_id", "timestamp"),
+    )
     
     id = Column(String(50), primary_key=True)
-    consultation_id = Column(String(50), index=True)
+    consultation_id = Column(String(50))
     sender_id = Column(String(50))
     sender_role = Column(String(20))
     content = Column(Text)
@@ -337,11 +358,13 @@ class AIAnalysisResult(Base):
     doctor_id = Column(String(50))
     patient_id = Column(String(50))
     
-    # Analysis content
-    analysis_markdown = Column(Text)  # Full markdown analysis
+    # Analysis content. The multi-KB payload columns are deferred as the
+    # "payload" group: queries that need them undefer_group("payload"),
+    # anything else reads only the narrow row
+    analysis_markdown = deferred(Column(Text), group="payload")  # Full markdown analysis
     executive_summary = Column(Text)
-    key_findings = Column(JSON, default=list)  # List of findings
-    extracted_documents = Column(JSON, default=list)  # Document extraction results
+    key_findings = deferred(Column(JSON, default=list), group="payload")  # List of findings
+    extracted_documents = deferred(Column(JSON, default=list), group="payload")  # Document extraction results
     medication_suggestions = Column(JSON, default=list)
     test_suggestions = Column(JSON, default=list)
     
@@ -391,3 +414,9 @@ class AIChatMessage(Base):
     sources_cited = Column(JSON, default=list)  # Referenced sources/documents
     
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+# Loader options for doctors read together with their profile and settings:
+# two batched "WHERE doctor_id IN (...)" queries for the whole result set.
+# Defined after all models: building them configures the mappers
+DOCTOR_DETAIL_OPTIONS = (selectinload(Doctor.profile), selectinload(Doctor.settings))
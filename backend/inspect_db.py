@@ -10,22 +10,32 @@ conn = sqlite3.connect(db_path)
 conn.row_factory = sqlite3.Row
 cursor = conn.cursor()
 
-# Get all tables
-cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-tables = [row[0] for row in cursor.fetchall()]
+# Get all tables with their columns in one query
+cursor.execute(
+    "SELECT m.name, p.name FROM sqlite_master m "
+    "JOIN pragma_table_info(m.name) p "
+    "WHERE m.type='table' ORDER BY m.rowid, p.cid"
+)
+columns = {}
+for table, column in cursor.fetchall():
+    columns.setdefault(table, []).append(column)
+tables = list(columns)
+
+# Row counts for every table in one statement
+counts = {}
+if tables:
+    cursor.execute(" UNION ALL ".join(
+        f"SELECT ?, COUNT(*) FROM \"{table}\"" for table in tables
+    ), tables)
+    counts = dict(cursor.fetchall())
+
 print("=" * 60)
 print("SQLITE DATABASE TABLES")
 print("=" * 60)
 
 for table in tables:
     print(f"\n📋 Table: {table}")
-    cursor.execute(f"SELECT COUNT(*) FROM {table}")
-    count = cursor.fetchone()[0]
-    print(f"   Rows: {count}")
-    
-    # Get columns
-    cursor.execute(f"PRAGMA table_info({table})")
-    columns = cursor.fetchall()
-    print(f"   Columns: {[col[1] for col in columns]}")
+    print(f"   Rows: {counts[table]}")
+    print(f"   Columns: {columns[table]}")
 
 conn.close()
@@ -14,6 +14,9 @@ print(f"Migrating database at: {db_path}")
 try:
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
+    # sqlite3 doesn't open transactions for DDL on its own; run both ALTERs
+    # in one so they share a single commit
+    cursor.execute("BEGIN")
     
     # Add encrypted_content column
     try:
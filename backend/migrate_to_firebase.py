@@ -1,10 +1,15 @@
 """
 Migration script: SQLite to Firebase Firestore
 Transfers all data from medvision.db to Firestore collections.
+
+Re-runs only send rows that changed since their last successful write;
+delete backend/.migration_cache.json to force a full re-upload.
 """
 import sqlite3
 import os
 import json
+import hashlib
+import threading
 from datetime import datetime
 from pathlib import Path
 
@@ -19,6 +24,36 @@ if env_path.exists():
 import firebase_admin
 from firebase_admin import credentials, firestore
 
+# Fast JSON encoder for row digests (optional)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# C ISO-8601 parser (optional), falls back to datetime.fromisoformat
+try:
+    import ciso8601
+    CISO8601_AVAILABLE = True
+except ImportError:
+    CISO8601_AVAILABLE = False
+
+# Retries per document before a failed write is reported and skipped
+WRITE_MAX_RETRIES = 5
+
+# Read-side tuning for the full-table scans (64 MB page cache, 256 MB mmap)
+READ_PRAGMAS = (
+    "cache_size=-65536",
+    "temp_store=MEMORY",
+    "mmap_size=268435456",
+)
+
+# Timestamp columns stored as Firestore timestamps rather than strings
+DATETIME_FIELDS = ('created_at', 'updated_at', 'scheduled_time')
+
+# Digests of the documents written by earlier runs, per Firestore project
+MIGRATION_CACHE_PATH = backend_dir / ".migration_cache.json"
+
 def init_firebase():
     """Initialize Firebase Admin SDK."""
     try:
@@ -54,60 +89,134 @@ def init_firebase():
     return firestore.client()
 
 
-def dict_from_row(row, columns):
-    """Convert SQLite row to dictionary."""
-    result = {}
-    for i, col in enumerate(columns):
-        val = row[i]
-        # Handle JSON strings
-        if isinstance(val, str):
-            if val.startswith('{') or val.startswith('['):
-                try:
-                    val = json.loads(val)
-                except:
-                    pass
-        result[col] = val
-    return result
+def parse_timestamp(value):
+    """Parse an ISO-8601 timestamp as stored by SQLAlchemy's DateTime."""
+    if CISO8601_AVAILABLE:
+        return ciso8601.parse_datetime(value)
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
 
 
-def migrate_table(cursor, db, table_name, collection_name, id_field='id'):
-    """Migrate a single table to Firestore collection."""
-    print(f"\n📦 Migrating {table_name} -> {collection_name}")
-    
-    cursor.execute(f"SELECT * FROM {table_name}")
-    rows = cursor.fetchall()
+def row_digest(data):
+    """Stable 64-bit hash of a converted row."""
+    if ORJSON_AVAILABLE:
+        raw = orjson.dumps(data, default=str, option=orjson.OPT_SORT_KEYS)
+    else:
+        raw = json.dumps(data, default=str, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+
+def load_migration_cache(project_id):
+    """Load {collection: {doc_id: digest}} from the last run against this project."""
+    try:
+        with open(MIGRATION_CACHE_PATH) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("project") != project_id:
+        return {}
+    return cache.get("collections", {})
+
+
+def save_migration_cache(project_id, collections):
+    """Write the digest cache, replacing the old file only once fully written."""
+    tmp_path = MIGRATION_CACHE_PATH.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"project": project_id, "collections": collections}, f)
+    os.replace(tmp_path, MIGRATION_CACHE_PATH)
+
+
+def migrate_table(cursor, db, table_name, collection_name, id_field='id', digests=None):
+    """Migrate a single table to Firestore collection.
     
-    if not rows:
-        print(f"   ⏭️ No data to migrate")
-        return 0
+    digests maps doc_id -> row_digest of what Firestore already holds; rows
+    with a matching digest are skipped, and it is updated as writes land.
+    """
+    print(f"\n📦 Migrating {table_name} -> {collection_name}")
     
-    # Get column names
+    # Find the JSON and DATETIME columns up front from their declared types
+    # (as SQLAlchemy creates them), so only those cells are converted instead
+    # of sniffing or trial-parsing every row
     cursor.execute(f"PRAGMA table_info({table_name})")
-    columns = [col[1] for col in cursor.fetchall()]
+    column_types = {col[1]: (col[2] or "").upper() for col in cursor.fetchall()}
+    json_columns = [name for name, col_type in column_types.items() if col_type == "JSON"]
+    datetime_columns = [name for name in DATETIME_FIELDS if column_types.get(name) == "DATETIME"]
     
+    # BulkWriter batches the sets (up to 500 per request), sends batches in
+    # parallel and ramps up within Firestore's rate limits. Its callbacks run
+    # on the writer's worker threads.
     migrated = 0
-    for row in rows:
-        data = dict_from_row(row, columns)
-        doc_id = data.get(id_field) or data.get('email') or str(migrated)
-        
+    lock = threading.Lock()
+    if digests is None:
+        digests = {}
+    pending = {}
+    
+    def on_result(reference, result, writer):
+        nonlocal migrated
+        with lock:
+            migrated += 1
+            digest = pending.pop(reference.id, None)
+            if digest:
+                digests[reference.id] = digest
+    
+    def on_error(failure, writer):
+        if failure.attempts < WRITE_MAX_RETRIES:
+            return True  # retry
+        print(f"   ❌ Error migrating {failure.operation.reference.id}: {failure.message}")
+        return False
+    
+    collection = db.collection(collection_name)
+    bulk_writer = db.bulk_writer()
+    bulk_writer.on_write_result(on_result)
+    bulk_writer.on_write_error(on_error)
+    
+    # Rows stream from SQLite into the writer as they are read, rather than
+    # the whole table being loaded into memory first
+    row_cursor = cursor.connection.cursor()
+    row_cursor.row_factory = sqlite3.Row
+    row_cursor.execute(f"SELECT * FROM {table_name}")
+    total = 0
+    skipped = 0
+    for row in row_cursor:
         # Clean up None values
-        data = {k: v for k, v in data.items() if v is not None}
+        data = {k: v for k, v in dict(row).items() if v is not None}
+        doc_id = str(data.get(id_field) or data.get('email') or total)
+        total += 1
+        
+        for key in json_columns:
+            if isinstance(data.get(key), str):
+                try:
+                    data[key] = json.loads(data[key])
+                except ValueError:
+                    pass
         
         # Convert datetime strings
-        for key in ['created_at', 'updated_at', 'scheduled_time']:
-            if key in data and isinstance(data[key], str):
+        for key in datetime_columns:
+            if isinstance(data.get(key), str):
                 try:
-                    data[key] = datetime.fromisoformat(data[key].replace('Z', '+00:00'))
-                except:
+                    data[key] = parse_timestamp(data[key])
+                except ValueError:
                     pass
         
-        try:
-            db.collection(collection_name).document(str(doc_id)).set(data, merge=True)
-            migrated += 1
-        except Exception as e:
-            print(f"   ❌ Error migrating {doc_id}: {e}")
+        # Unchanged since the last successful write: nothing to send
+        digest = row_digest(data)
+        if digests.get(doc_id) == digest:
+            skipped += 1
+            continue
+        pending[doc_id] = digest
+        
+        bulk_writer.set(collection.document(doc_id), data, merge=True)
+    row_cursor.close()
+    # Waits for every write, including retries
+    bulk_writer.close()
     
-    print(f"   ✅ Migrated {migrated}/{len(rows)} records")
+    if not total:
+        print(f"   ⏭️ No data to migrate")
+        return 0
+    
+    if skipped:
+        print(f"   ✅ Migrated {migrated}/{total} records ({skipped} unchanged, skipped)")
+    else:
+        print(f"   ✅ Migrated {migrated}/{total} records")
     return migrated
 
 
@@ -121,7 +230,9 @@ def main():
     
     # Connect to SQLite
     sqlite_path = backend_dir / "medvision.db"
-    conn = sqlite3.connect(sqlite_path)
+    conn = sqlite3.connect(f"{sqlite_path.resolve().as_uri()}?mode=ro", uri=True)
+    for pragma in READ_PRAGMAS:
+        conn.execute(f"PRAGMA {pragma}")
     cursor = conn.cursor()
     
     # Migration mapping: SQLite table -> Firestore collection
@@ -138,17 +249,23 @@ def main():
         ("follows", "follows", "id"),
     ]
     
+    cache = load_migration_cache(db.project)
+    
     total_migrated = 0
     for table, collection, id_field in migrations:
         try:
             cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table}'")
             if cursor.fetchone():
-                count = migrate_table(cursor, db, table, collection, id_field)
+                digests = cache.setdefault(collection, {})
+                count = migrate_table(cursor, db, table, collection, id_field, digests)
                 total_migrated += count
             else:
                 print(f"\n⏭️ Table {table} not found, skipping")
         except Exception as e:
             print(f"\n❌ Error with {table}: {e}")
+        finally:
+            # Saved per table, so writes that landed survive a later failure
+            save_migration_cache(db.project, cache)
     
     conn.close()
     
@@ -0,0 +1,109 @@
+"""
+Regression tests for the patient report store.
+Covers migration of legacy <safe_id>.json files racing with reads and saves.
+
+Usage:
+    cd backend
+    python test_report_storage.py
+"""
+
+import json
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Set up path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.report_storage_service import ReportStorageService
+
+
+PATIENT_ID = "legacy@example.com"
+
+
+def make_legacy_store(count=3):
+    """Temp storage dir holding one legacy JSON file of `count` reports."""
+    storage_dir = Path(tempfile.mkdtemp())
+    # Legacy files store newest first
+    reports = [{"report_id": f"old{i}", "filename": f"old{i}.pdf"} for i in reversed(range(count))]
+    legacy = {"patient_id": PATIENT_ID, "reports": reports}
+    (storage_dir / "legacy_at_example_com.json").write_text(json.dumps(legacy))
+    return storage_dir
+
+
+class SlowMigrationStore(ReportStorageService):
+    """Store whose migration pauses mid-way, so another thread can interleave."""
+    
+    def __init__(self, storage_dir):
+        super().__init__(storage_dir)
+        self.migration_started = threading.Event()
+        self.resume_migration = threading.Event()
+    
+    def _write_segment(self, segment_path, reports):
+        self.migration_started.set()
+        self.resume_migration.wait(timeout=5)
+        super()._write_segment(segment_path, reports)
+
+
+def test_save_during_migration():
+    """A save racing the legacy migration must not be lost."""
+    storage_dir = make_legacy_store()
+    try:
+        store = SlowMigrationStore(storage_dir)
+        reader = threading.Thread(target=store.get_patient_reports, args=(PATIENT_ID,))
+        reader.start()
+        assert store.migration_started.wait(timeout=5), "migration did not start"
+        
+        saved = {}
+        writer = threading.Thread(
+            target=lambda: saved.update(report_id=store.save_report(PATIENT_ID, {"filename": "new.pdf"}))
+        )
+        writer.start()
+        time.sleep(0.2)  # Let the save reach the store while migration is paused
+        store.resume_migration.set()
+        reader.join()
+        writer.join()
+        
+        # A fresh instance reads only what reached disk
+        report_ids = [r["report_id"] for r in ReportStorageService(storage_dir).get_patient_reports(PATIENT_ID)]
+        assert report_ids == [saved["report_id"], "old2", "old1", "old0"], report_ids
+        print("[PASS] save during migration")
+    finally:
+        shutil.rmtree(storage_dir)
+
+
+def test_concurrent_readers_migrate_once():
+    """Two readers racing the migration both see the legacy reports."""
+    storage_dir = make_legacy_store()
+    try:
+        store = SlowMigrationStore(storage_dir)
+        results, errors = [], []
+        
+        def read():
+            try:
+                results.append([r["report_id"] for r in store.get_patient_reports(PATIENT_ID)])
+            except Exception as e:
+                errors.append(e)
+        
+        readers = [threading.Thread(target=read) for _ in range(2)]
+        for reader in readers:
+            reader.start()
+        assert store.migration_started.wait(timeout=5), "migration did not start"
+        store.resume_migration.set()
+        for reader in readers:
+            reader.join()
+        
+        assert not errors, errors
+        assert results == [["old2", "old1", "old0"]] * 2, results
+        assert not (storage_dir / "legacy_at_example_com.json").exists()
+        print("[PASS] concurrent readers migrate once")
+    finally:
+        shutil.rmtree(storage_dir)
+
+
+if __name__ == "__main__":
+    test_save_during_migration()
+    test_concurrent_readers_migrate_once()
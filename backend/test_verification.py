@@ -10,40 +10,41 @@ Usage:
 import asyncio
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Set up path for imports
 import sys
 sys.path.insert(0, str(Path(__file__).parent))
 
-from app.services.verification_service import verification_service
+from app.services.verification_service import get_verification_service
+
+
+MIME_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".pdf": "application/pdf",
+}
+
+
+def _load_document(file_path):
+    """Read one test document as (content, mime_type)."""
+    print(f"Loading: {file_path.name}")
+    return file_path.read_bytes(), MIME_TYPES[file_path.suffix.lower()]
 
 
 def load_test_documents():
     """Load test documents from test_data folder."""
     test_data_dir = Path(__file__).parent / "test_data"
-    documents = []
-    
-    for file_path in test_data_dir.glob("*"):
-        if file_path.suffix.lower() in [".png", ".jpg", ".jpeg", ".pdf"]:
-            print(f"Loading: {file_path.name}")
-            with open(file_path, "rb") as f:
-                content = f.read()
-            
-            # Determine mime type
-            if file_path.suffix.lower() in [".png"]:
-                mime_type = "image/png"
-            elif file_path.suffix.lower() in [".jpg", ".jpeg"]:
-                mime_type = "image/jpeg"
-            else:
-                mime_type = "application/pdf"
-            
-            documents.append((content, mime_type))
-    
-    return documents
-
-
-async def test_verification():
+    files = [fp for fp in test_data_dir.glob("*") if fp.suffix.lower() in MIME_TYPES]
+    
+    # Read the files in parallel; map keeps them in directory order
+    with ThreadPoolExecutor(max_workers=min(8, len(files) or 1)) as executor:
+        return list(executor.map(_load_document, files))
+
+
+async def test_verification(documents):
     """Test the verification system with sample data."""
     
     print("\n" + "="*60)
@@ -64,9 +65,6 @@ async def test_verification():
         print(f"  {key}: {value}")
     print()
     
-    # Load test documents
-    documents = load_test_documents()
-    
     if not documents:
         print("[ERROR] No test documents found in test_data/ folder!")
         print("Please add sample documents (PNG, JPG, or PDF) to test_data/")
@@ -81,7 +79,7 @@ async def test_verification():
     print("-" * 40)
     
     try:
-        result = await verification_service.verify_doctor_documents(form_data, documents)
+        result = await get_verification_service().verify_doctor_documents(form_data, documents)
         
         print("\n" + "="*60)
         print("  VERIFICATION RESULTS")
@@ -170,7 +168,7 @@ async def test_verification():
         traceback.print_exc()
 
 
-async def test_mismatched_data():
+async def test_mismatched_data(documents):
     """Test with intentionally mismatched data to verify rejection."""
     
     print("\n" + "="*60)
@@ -191,8 +189,6 @@ async def test_mismatched_data():
         print(f"  {key}: {value}")
     print()
     
-    documents = load_test_documents()
-    
     if not documents:
         print("[SKIP] No test documents")
         return
@@ -200,7 +196,7 @@ async def test_mismatched_data():
     print("RUNNING VERIFICATION...")
     
     try:
-        result = await verification_service.verify_doctor_documents(form_data, documents)
+        result = await get_verification_service().verify_doctor_documents(form_data, documents)
         
         print(f"\nSTATUS: {result.status.value}")
         print(f"CONFIDENCE: {result.confidence_score:.1f}%")
@@ -212,6 +208,17 @@ async def test_mismatched_data():
         print(f"[ERROR] {e}")
 
 
+async def main_async():
+    """Run the match and mismatch tests concurrently."""
+    # Both tests use the same files, so read them from disk once
+    documents = load_test_documents()
+    
+    # The two checks submit the same documents with different form data:
+    # the service's in-flight coalescing (single and batched analysis)
+    # sends them to Gemini once, and its limiter caps concurrent calls
+    await asyncio.gather(test_verification(documents), test_mismatched_data(documents))
+
+
 if __name__ == "__main__":
     print("\n" + "="*60)
     print("  MEDVISION AI - VERIFICATION SYSTEM TEST")
@@ -225,10 +232,6 @@ if __name__ == "__main__":
         print("Please add your API key to backend/.env")
         print("Example: GEMINI_API_KEY=your-api-key-here\n")
     
-    # Run tests
-    asyncio.run(test_verification())
-    
-    # Optionally run mismatch test
-    print("\n" + "-"*60)
-    print("Running mismatch test to verify rejection logic...")
-    asyncio.run(test_mismatched_data())
+    # Run both tests on one event loop
+    print("\nRunning verification and mismatch tests concurrently...")
+    asyncio.run(main_async())
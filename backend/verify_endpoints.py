@@ -2,8 +2,18 @@ import requests
 import time
 import sys
 import json
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 BASE_URL = "http://localhost:8001"
+REQUEST_TIMEOUT = 10
+# Timeline generation can call the AI service, so it gets longer
+TIMELINE_TIMEOUT = 120
+
+# One pooled session, so the checks reuse connections instead of opening a
+# new one per request
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
 
 def print_result(name, passed, details=""):
     status = "✅ PASS" if passed else "❌ FAIL"
@@ -15,20 +25,20 @@ def wait_for_server():
     print(f"Waiting for server at {BASE_URL}...")
     for i in range(10):
         try:
-            response = requests.get(f"{BASE_URL}/")
+            response = session.get(f"{BASE_URL}/", timeout=REQUEST_TIMEOUT)
             if response.status_code == 200:
                 print("Server is up!")
                 img_url = response.json().get("message")
                 print(f"Server message: {img_url}")
                 return True
-        except requests.exceptions.ConnectionError:
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
             time.sleep(2)
     print("Server failed to start.")
     return False
 
 def verify_patients():
     try:
-        response = requests.get(f"{BASE_URL}/api/patients")
+        response = session.get(f"{BASE_URL}/api/patients", timeout=REQUEST_TIMEOUT)
         if response.status_code == 200:
             patients = response.json()
             count = len(patients)
@@ -43,7 +53,7 @@ def verify_patients():
 
 def verify_patient_detail(patient_id):
     try:
-        response = requests.get(f"{BASE_URL}/api/patients/{patient_id}")
+        response = session.get(f"{BASE_URL}/api/patients/{patient_id}", timeout=REQUEST_TIMEOUT)
         if response.status_code == 200:
             data = response.json()
             name = data.get("name", "Unknown")
@@ -60,7 +70,7 @@ def verify_patient_timeline(patient_id):
     try:
         print("Fetching timeline (this may take a moment)...")
         start = time.time()
-        response = requests.get(f"{BASE_URL}/api/patients/{patient_id}/timeline")
+        response = session.get(f"{BASE_URL}/api/patients/{patient_id}/timeline", timeout=TIMELINE_TIMEOUT)
         duration = time.time() - start
         
         if response.status_code == 200:
@@ -89,8 +99,12 @@ def main():
         patient_id = first_patient.get("id") if isinstance(first_patient, dict) else first_patient
         
         if patient_id:
-            verify_patient_detail(patient_id)
-            verify_patient_timeline(patient_id)
+            # Detail and timeline are independent, so check them concurrently
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                detail = executor.submit(verify_patient_detail, patient_id)
+                timeline = executor.submit(verify_patient_timeline, patient_id)
+                detail.result()
+                timeline.result()
         else:
             print("Could not extract patient ID")
     else:
@@ -5,12 +5,27 @@ Creates Sarah Thompson's 8-year cancer journey for demo purposes.
 import json
 import random
 from datetime import datetime, timedelta
+from operator import itemgetter
 import os
 
+import numpy as np
 
-def generate_sarah_thompson():
+# orjson (optional) encodes the demo file much faster than stdlib json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+DEMO_SEED = 42
+
+
+def generate_sarah_thompson(seed=DEMO_SEED):
     """Generate 8-year cancer patient journey for demo."""
     
+    # Seeded generators, so the demo dataset is the same on every run
+    rng = random.Random(seed)
+    
     base_date = datetime(2018, 3, 15)
     
     patient = {
@@ -41,39 +56,39 @@ def generate_sarah_thompson():
         ("Bone Scan", "Skeleton", ["No skeletal metastases", "Stable bone lesions", "L3 vertebra uptake"])
     ]
     
-    scan_id = 1
-    for year in range(8):
-        scans_this_year = random.randint(2, 4)
-        for _ in range(scans_this_year):
-            days_offset = year * 365 + random.randint(0, 365)
-            scan_date = base_date + timedelta(days=days_offset)
-            
-            scan_type, body_part, findings_options = random.choice(scan_configs)
-            
-            # Progressive findings based on year
-            if year < 4:
-                finding = findings_options[0] if random.random() > 0.2 else findings_options[1]
-                impression = "Stable disease. Continue current management."
-                urgency = random.choice([1, 2])
-            elif year < 6:
-                finding = findings_options[1]
-                impression = "Stable with minor changes. Follow-up recommended."
-                urgency = random.choice([2, 3])
-            else:
-                finding = random.choice(findings_options[1:])
-                impression = "Disease progression noted. Consider treatment modification."
-                urgency = random.choice([3, 4, 5])
-            
-            patient["scans"].append({
-                "id": f"scan_{scan_id:03d}",
-                "date": scan_date.strftime("%Y-%m-%d"),
-                "scan_type": scan_type,
-                "body_part": body_part,
-                "findings": finding,
-                "impression": impression,
-                "urgency": urgency
-            })
-            scan_id += 1
+    def make_scan(scan_id, year):
+        days_offset = year * 365 + rng.randint(0, 365)
+        scan_date = base_date + timedelta(days=days_offset)
+        
+        scan_type, body_part, findings_options = rng.choice(scan_configs)
+        
+        # Progressive findings based on year
+        if year < 4:
+            finding = findings_options[0] if rng.random() > 0.2 else findings_options[1]
+            impression = "Stable disease. Continue current management."
+            urgency = rng.choice([1, 2])
+        elif year < 6:
+            finding = findings_options[1]
+            impression = "Stable with minor changes. Follow-up recommended."
+            urgency = rng.choice([2, 3])
+        else:
+            finding = rng.choice(findings_options[1:])
+            impression = "Disease progression noted. Consider treatment modification."
+            urgency = rng.choice([3, 4, 5])
+        
+        return {
+            "id": f"scan_{scan_id:03d}",
+            "date": scan_date.strftime("%Y-%m-%d"),
+            "scan_type": scan_type,
+            "body_part": body_part,
+            "findings": finding,
+            "impression": impression,
+            "urgency": urgency
+        }
+    
+    # Draw every year's scan count up front, then build the list in one pass
+    scan_years = [year for year in range(8) for _ in range(rng.randint(2, 4))]
+    patient["scans"] = [make_scan(scan_id, year) for scan_id, year in enumerate(scan_years, 1)]
     
     # Generate labs (monthly for 8 years = 96 records)
     lab_tests = [
@@ -88,45 +103,50 @@ def generate_sarah_thompson():
         ("Calcium", "mg/dL", 8.5, 10.5, "metabolic"),
     ]
     
-    lab_id = 1
-    for month in range(96):
-        lab_date = base_date + timedelta(days=month * 30 + random.randint(-3, 3))
-        
-        results = []
-        for test_name, unit, low, high, category in lab_tests:
-            # Simulate realistic trends
-            if category == "tumor_marker" and month > 60:
-                # Elevated tumor markers in later years
-                multiplier = 1.5 + (month - 60) * 0.05
-                value = random.uniform(low, high) * multiplier
-            elif category == "cbc" and month > 48:
-                # Slightly lower CBC during treatment
-                value = random.uniform(low * 0.85, high * 0.95)
-            else:
-                value = random.uniform(low * 0.9, high * 1.1)
-            
-            flag = "NORMAL"
-            if value < low:
-                flag = "LOW"
-            elif value > high:
-                flag = "HIGH"
-            elif value > high * 1.5:
-                flag = "CRITICAL"
-            
-            results.append({
-                "test": test_name,
-                "value": round(value, 1),
-                "unit": unit,
-                "reference_range": f"{low}-{high}",
-                "flag": flag
-            })
-        
-        patient["labs"].append({
-            "id": f"lab_{lab_id:03d}",
-            "date": lab_date.strftime("%Y-%m-%d"),
-            "results": results
-        })
-        lab_id += 1
+    # Draw the whole months x tests matrix in one go: each cell gets its own
+    # sampling range and multiplier, and flags are classified on the whole matrix
+    np_rng = np.random.default_rng(seed)
+    n_months = 96
+    ref_low = np.array([test[2] for test in lab_tests], dtype=float)
+    ref_high = np.array([test[3] for test in lab_tests], dtype=float)
+    categories = np.array([test[4] for test in lab_tests])
+    months = np.arange(n_months)[:, None]
+    
+    # Elevated tumor markers in later years
+    late_tumor = (categories == "tumor_marker") & (months > 60)
+    # Slightly lower CBC during treatment
+    treated_cbc = (categories == "cbc") & (months > 48)
+    
+    sample_low = np.where(late_tumor, ref_low, np.where(treated_cbc, ref_low * 0.85, ref_low * 0.9))
+    sample_high = np.where(late_tumor, ref_high, np.where(treated_cbc, ref_high * 0.95, ref_high * 1.1))
+    multiplier = np.where(late_tumor, 1.5 + (months - 60) * 0.05, 1.0)
+    values = np_rng.uniform(sample_low, sample_high) * multiplier
+    
+    flags = np.where(values < ref_low, "LOW",
+            np.where(values > ref_high * 1.5, "CRITICAL",
+            np.where(values > ref_high, "HIGH", "NORMAL")))
+    
+    lab_values = np.round(values, 1).tolist()
+    lab_flags = flags.tolist()
+    day_jitter = np_rng.integers(-3, 4, size=n_months).tolist()
+    
+    patient["labs"] = [
+        {
+            "id": f"lab_{month + 1:03d}",
+            "date": (base_date + timedelta(days=month * 30 + day_jitter[month])).strftime("%Y-%m-%d"),
+            "results": [
+                {
+                    "test": test_name,
+                    "value": lab_values[month][i],
+                    "unit": unit,
+                    "reference_range": f"{low}-{high}",
+                    "flag": lab_flags[month][i]
+                }
+                for i, (test_name, unit, low, high, _) in enumerate(lab_tests)
+            ]
+        }
+        for month in range(n_months)
+    ]
     
     # Generate treatments
     patient["treatments"] = [
@@ -184,49 +204,49 @@ def generate_sarah_thompson():
         "Phone encounter. Patient called regarding {concern}. Advised {advice}.",
     ]
     
-    note_id = 1
-    for year in range(8):
-        notes_this_year = random.randint(8, 12)
-        for _ in range(notes_this_year):
-            days_offset = year * 365 + random.randint(0, 365)
-            note_date = base_date + timedelta(days=days_offset)
-            
-            author = random.choice([
-                "Dr. Chen, Medical Oncology",
-                "Dr. Williams, Radiation Oncology",
-                "Dr. Patel, Primary Care",
-                "NP Johnson, Oncology"
-            ])
-            
-            symptoms = random.choice(["no new symptoms", "mild fatigue", "joint pain", "hot flashes"])
-            exam_finding = random.choice(["unremarkable", "stable", "no concerning findings"])
-            assessment = random.choice(["Stable disease", "Responding to treatment", "Needs close monitoring"])
-            plan = random.choice(["Continue current regimen", "Follow up in 3 months", "Repeat imaging in 6 weeks"])
-            
-            content = random.choice(note_templates).format(
-                symptoms=symptoms,
-                exam_finding=exam_finding,
-                assessment=assessment,
-                plan=plan,
-                treatment="chemotherapy" if year < 2 else "hormone therapy",
-                side_effects="No significant side effects",
-                next_visit="4 weeks",
-                concern=random.choice(["medication refill", "test results", "symptom question"]),
-                advice=random.choice(["Continue as prescribed", "Schedule appointment", "Monitor and call back if worse"])
-            )
-            
-            patient["notes"].append({
-                "id": f"note_{note_id:03d}",
-                "date": note_date.strftime("%Y-%m-%d"),
-                "author": author,
-                "content": content
-            })
-            note_id += 1
+    def make_note(note_id, year):
+        days_offset = year * 365 + rng.randint(0, 365)
+        note_date = base_date + timedelta(days=days_offset)
+        
+        author = rng.choice([
+            "Dr. Chen, Medical Oncology",
+            "Dr. Williams, Radiation Oncology",
+            "Dr. Patel, Primary Care",
+            "NP Johnson, Oncology"
+        ])
+        
+        symptoms = rng.choice(["no new symptoms", "mild fatigue", "joint pain", "hot flashes"])
+        exam_finding = rng.choice(["unremarkable", "stable", "no concerning findings"])
+        assessment = rng.choice(["Stable disease", "Responding to treatment", "Needs close monitoring"])
+        plan = rng.choice(["Continue current regimen", "Follow up in 3 months", "Repeat imaging in 6 weeks"])
+        
+        content = rng.choice(note_templates).format(
+            symptoms=symptoms,
+            exam_finding=exam_finding,
+            assessment=assessment,
+            plan=plan,
+            treatment="chemotherapy" if year < 2 else "hormone therapy",
+            side_effects="No significant side effects",
+            next_visit="4 weeks",
+            concern=rng.choice(["medication refill", "test results", "symptom question"]),
+            advice=rng.choice(["Continue as prescribed", "Schedule appointment", "Monitor and call back if worse"])
+        )
+        
+        return {
+            "id": f"note_{note_id:03d}",
+            "date": note_date.strftime("%Y-%m-%d"),
+            "author": author,
+            "content": content
+        }
+    
+    note_years = [year for year in range(8) for _ in range(rng.randint(8, 12))]
+    patient["notes"] = [make_note(note_id, year) for note_id, year in enumerate(note_years, 1)]
     
-    # Sort all lists by date
-    patient["scans"].sort(key=lambda x: x["date"])
-    patient["labs"].sort(key=lambda x: x["date"])
-    patient["notes"].sort(key=lambda x: x["date"])
+    # Sort all lists by date (ISO strings sort chronologically)
+    by_date = itemgetter("date")
+    patient["scans"].sort(key=by_date)
+    patient["labs"].sort(key=by_date)
+    patient["notes"].sort(key=by_date)
     
     return patient
 
@@ -238,8 +258,14 @@ def save_demo_data(patient: dict):
     
     filepath = os.path.join("patients", "sarah_thompson.json")
     
-    with open(filepath, "w") as f:
-        json.dump(patient, f, indent=2)
+    # Encode once; the same buffer is written and used for the size estimate
+    if ORJSON_AVAILABLE:
+        buf = orjson.dumps(patient, option=orjson.OPT_INDENT_2)
+    else:
+        buf = json.dumps(patient, indent=2).encode("utf-8")
+    
+    with open(filepath, "wb") as f:
+        f.write(buf)
     
     print(f"Demo data saved to {filepath}")
     print(f"Patient: {patient['profile']['name']}")
@@ -249,7 +275,7 @@ def save_demo_data(patient: dict):
     print(f"Notes: {len(patient['notes'])}")
     
     # Calculate approximate token count
-    total_chars = len(json.dumps(patient))
+    total_chars = len(buf)
     approx_tokens = total_chars // 4
     print(f"Approximate tokens: {approx_tokens:,}")
 